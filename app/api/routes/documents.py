@@ -1,5 +1,7 @@
 """Document management endpoints."""
 
+import asyncio
+
 from fastapi import APIRouter, File, HTTPException, UploadFile
 
 from app.api.schemas import (
@@ -7,8 +9,8 @@ from app.api.schemas import (
     DocumentUploadResponse,
     ErrorResponse,
 )
-from app.core.document_processor import DocumentProcessor
-from app.core.vector_store import VectorStoreService
+from app.core.document_processor import get_document_processor
+from app.core.vector_store import get_vector_store_service
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -39,32 +41,35 @@ async def upload_document(
         )
 
     try:
-        # Process document
-        processor = DocumentProcessor()
-        chunks = processor.process_upload(file.file, file.filename)
+        # Process document, streaming chunks page by page into the vector store
+        processor = get_document_processor()
+        chunks = await asyncio.to_thread(
+            processor.process_upload_iter, file.file, file.filename
+        )
+
+        # Add to vector store
+        vector_store = get_vector_store_service()
+        document_ids = await vector_store.aadd_documents(chunks)
 
-        if not chunks:
+        if not document_ids:
             raise HTTPException(
                 status_code=400,
                 detail="No content could be extracted from the document",
             )
 
-        # Add to vector store
-        vector_store = VectorStoreService()
-        document_ids = vector_store.add_documents(chunks)
-
         logger.info(
-            f"Successfully processed {file.filename}: "
-            f"{len(chunks)} chunks, {len(document_ids)} documents"
+            "Successfully processed %s: %d chunks", file.filename, len(document_ids)
         )
 
         return DocumentUploadResponse(
             message="Document uploaded and processed successfully",
             filename=file.filename,
-            chunks_created=len(chunks),
-            document_ids=document_ids,
+            chunks_created=len(document_ids),
+            document_ids=[str(point_id) for point_id in document_ids],
         )
 
+    except HTTPException:
+        raise
     except ValueError as e:
         logger.warning(f"Invalid file upload: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -87,7 +92,7 @@ async def get_collection_info() -> DocumentListResponse:
     logger.debug("Collection info requested")
 
     try:
-        vector_store = VectorStoreService()
+        vector_store = get_vector_store_service()
         info = vector_store.get_collection_info()
 
         return DocumentListResponse(
@@ -117,8 +122,10 @@ async def delete_collection() -> dict:
     logger.warning("Collection deletion requested")
 
     try:
-        vector_store = VectorStoreService()
+        vector_store = get_vector_store_service()
         vector_store.delete_collection()
+        # Drop the shared service so the next request recreates the collection
+        get_vector_store_service.cache_clear()
 
         return {"message": "Collection deleted successfully"}
     except Exception as e:
@@ -155,9 +155,9 @@ async def search_documents(
     logger.info(f"Search received: {request.question[:100]}...")
 
     try:
-        from app.core.vector_store import VectorStoreService
+        from app.core.vector_store import get_vector_store_service
 
-        vector_store = VectorStoreService()
+        vector_store = get_vector_store_service()
         results = vector_store.search_with_scores(request.question)
 
         documents = [
@@ -1,7 +1,9 @@
 """Application configuration using pydantic-settings."""
 
 from functools import lru_cache
+from typing import Literal
 
+from pydantic import AliasChoices, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -21,16 +23,37 @@ class Settings(BaseSettings):
     # Qdrant Cloud Configuration
     qdrant_url: str
     qdrant_api_key: str
+    qdrant_prefer_grpc: bool = True  # Binary protobuf transport for upserts/search
+    qdrant_grpc_port: int = 6334
+    qdrant_timeout: int = 30
 
     # Collection Settings
     collection_name: str = "rag_documents"
+    upsert_batch_size: int = 256  # Documents embedded and upserted per batch
 
     # Document Processing Settings
     chunk_size: int = 1000
     chunk_overlap: int = 200
+    pdf_backend: Literal["pypdf", "pdfium"] = "pdfium"  # pdfium is native (C++)
 
     # Model Configuration
     embedding_model: str = "text-embedding-3-small"
+    # Truncated (Matryoshka) embedding size; changing it requires recreating
+    # the Qdrant collection, whose vector size is fixed at creation
+    embedding_dimensions: int = 512
+    # Texts per OpenAI embeddings request (the API caps a request at 2048 inputs)
+    openai_embedding_batch_size: int = Field(
+        default=512,
+        ge=1,
+        le=2048,
+        validation_alias=AliasChoices(
+            "openai_embedding_batch_size",
+            "rag_embedding_openai_batch_size",
+        ),
+    )
+    embedding_max_concurrency: int = 5  # In-flight batches for async embedding
+    embedding_max_retries: int = 5  # Retries per batch on rate limiting
+    embedding_cache_max_entries: int = 100_000  # In-process cache of text -> vector
     llm_model: str = "gpt-4o-mini"
     llm_temperature: float = 0.0
 
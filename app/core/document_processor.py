@@ -1,9 +1,15 @@
 """Document processing module for loading and chunking documents."""
 
-import tempfile
+import csv
+import io
+import os
+import threading
+from collections.abc import Callable, Iterator
+from functools import lru_cache, partial
 from pathlib import Path
 from typing import BinaryIO
 
+import pypdfium2 as pdfium
 from langchain_community.document_loaders import (
     CSVLoader,
     PyPDFLoader,
@@ -11,6 +17,7 @@ from langchain_community.document_loaders import (
 )
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from pypdf import PdfReader
 
 from app.config import get_settings
 from app.utils.logger import get_logger
@@ -18,6 +25,113 @@ from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Ordered from coarsest to finest; the trailing "" splits on characters and
+# guarantees the recursion terminates
+SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+
+# Distinct texts whose length is memoized for non-trivial length functions
+LENGTH_CACHE_SIZE = 4096
+
+# PDFium is not thread-safe, and uploads are parsed in worker threads, so
+# every call into the library goes through this lock
+_pdfium_lock = threading.Lock()
+
+
+def _iter_pdfium_pages(pdf_input: str | bytes, source: str) -> Iterator[Document]:
+    """Extract text from a PDF with PDFium, one Document per page.
+
+    Args:
+        pdf_input: Path to the PDF or its raw bytes
+        source: Value for the ``source`` metadata field
+
+    Yields:
+        Document objects with ``source`` and ``page`` metadata, like PyPDFLoader
+    """
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(pdf_input)
+    try:
+        with _pdfium_lock:
+            page_count = len(pdf)
+        for i in range(page_count):
+            # Extract under the lock, but yield outside it so a slow consumer
+            # does not block other threads' PDFs
+            with _pdfium_lock:
+                page = pdf[i]
+                try:
+                    textpage = page.get_textpage()
+                    try:
+                        text = textpage.get_text_bounded()
+                    finally:
+                        textpage.close()
+                finally:
+                    page.close()
+            # PDFium emits CRLF line breaks; normalize so "\n\n" splits apply
+            text = text.replace("\r\n", "\n")
+            yield Document(page_content=text, metadata={"source": source, "page": i})
+    finally:
+        with _pdfium_lock:
+            pdf.close()
+
+
+def _format_csv_value(value: str | list[str] | None) -> str | None:
+    """Format a csv.DictReader value the way CSVLoader does.
+
+    Args:
+        value: Field value, list of overflow values, or None for missing fields
+
+    Returns:
+        Stripped string, comma-joined overflow values, or None
+    """
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, list):
+        return ",".join(map(str.strip, value))
+    return value
+
+
+class FastPathTextSplitter(RecursiveCharacterTextSplitter):
+    """Recursive splitter that skips separator search for short texts."""
+
+    def _split_text(self, text: str, separators: list[str]) -> list[str]:
+        """Split text, returning it whole if it already fits in one chunk."""
+        if self._length_function(text) <= self._chunk_size:
+            text = text.strip() if self._strip_whitespace else text
+            return [text] if text else []
+        return super()._split_text(text, separators)
+
+
+@lru_cache(maxsize=8)
+def _get_splitter(
+    chunk_size: int,
+    chunk_overlap: int,
+    length_function: Callable[[str], int] = len,
+) -> FastPathTextSplitter:
+    """Get a cached text splitter for the given parameters.
+
+    Processors with the same settings share one splitter, which is stateless
+    between calls. Non-``len`` length functions are memoized, since the
+    recursive splitter measures the same pieces several times while merging;
+    ``len`` is left unwrapped as it is cheaper than a cache lookup.
+
+    Args:
+        chunk_size: Size of text chunks
+        chunk_overlap: Overlap between chunks
+        length_function: Measures chunk length
+
+    Returns:
+        Configured FastPathTextSplitter instance
+    """
+    if length_function is not len:
+        length_function = lru_cache(maxsize=LENGTH_CACHE_SIZE)(length_function)
+
+    return FastPathTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=SEPARATORS,
+        is_separator_regex=False,
+        length_function=length_function,
+    )
+
 
 class DocumentProcessor:
     """Process documents for RAG pipeline."""
@@ -28,27 +142,31 @@ class DocumentProcessor:
         self,
         chunk_size: int | None = None,
         chunk_overlap: int | None = None,
+        length_function: Callable[[str], int] = len,
     ):
         """Initialize document processor.
 
         Args:
             chunk_size: Size of text chunks (default from settings)
             chunk_overlap: Overlap between chunks (default from settings)
+            length_function: Measures chunk length, e.g. a token counter
+                (default: character count)
         """
         settings = get_settings()
         self.chunk_size = chunk_size or settings.chunk_size
         self.chunk_overlap = chunk_overlap or settings.chunk_overlap
+        self.pdf_backend = settings.pdf_backend
 
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
-            separators=["\n\n", "\n", ". ", " ", ""],
-            length_function=len,
+        self.text_splitter = _get_splitter(
+            self.chunk_size,
+            self.chunk_overlap,
+            length_function,
         )
 
         logger.info(
-            f"DocumentProcessor initialized with chunk_size={self.chunk_size}, "
-            f"chunk_overlap={self.chunk_overlap}"
+            "DocumentProcessor initialized with chunk_size=%d, chunk_overlap=%d",
+            self.chunk_size,
+            self.chunk_overlap,
         )
     
     
@@ -61,13 +179,16 @@ class DocumentProcessor:
         Returns:
             List of Document objects
         """
-        file_path = Path(file_path)
-        logger.info(f"Loading PDF: {file_path.name}")
+        path = os.fspath(file_path)
+        logger.info("Loading PDF: %s", path)
 
-        loader = PyPDFLoader(str(file_path))
-        documents = loader.load()
+        if self.pdf_backend == "pdfium":
+            documents = list(_iter_pdfium_pages(path, path))
+        else:
+            loader = PyPDFLoader(path)
+            documents = loader.load()
 
-        logger.info(f"Loaded {len(documents)} pages from {file_path.name}")
+        logger.info("Loaded %d pages from %s", len(documents), path)
         return documents
 
 
@@ -80,13 +201,13 @@ class DocumentProcessor:
         Returns:
             List of Document objects
         """
-        file_path = Path(file_path)
-        logger.info(f"Loading text file: {file_path.name}")
+        path = os.fspath(file_path)
+        logger.info("Loading text file: %s", path)
 
-        loader = TextLoader(str(file_path), encoding="utf-8")
+        loader = TextLoader(path, encoding="utf-8")
         documents = loader.load()
 
-        logger.info(f"Loaded text file: {file_path.name}")
+        logger.info("Loaded text file: %s", path)
         return documents
 
     def load_csv(self, file_path: str | Path) -> list[Document]:
@@ -98,13 +219,13 @@ class DocumentProcessor:
         Returns:
             List of Document objects (one per row)
         """
-        file_path = Path(file_path)
-        logger.info(f"Loading CSV: {file_path.name}")
+        path = os.fspath(file_path)
+        logger.info("Loading CSV: %s", path)
 
-        loader = CSVLoader(str(file_path), encoding="utf-8")
+        loader = CSVLoader(path, encoding="utf-8")
         documents = loader.load()
 
-        logger.info(f"Loaded {len(documents)} rows from {file_path.name}")
+        logger.info("Loaded %d rows from %s", len(documents), path)
         return documents
 
 
@@ -120,8 +241,8 @@ class DocumentProcessor:
         Raises:
             ValueError: If file extension is not supported
         """
-        file_path = Path(file_path)
-        extension = file_path.suffix.lower()
+        path = os.fspath(file_path)
+        extension = Path(path).suffix.lower()
 
         if extension not in self.SUPPORTED_EXTENSIONS:
             raise ValueError(
@@ -135,7 +256,44 @@ class DocumentProcessor:
             ".csv": self.load_csv,
         }
 
-        return loaders[extension](file_path)
+        return loaders[extension](path)
+
+    def load_file_iter(self, file_path: str | Path) -> Iterator[Document]:
+        """Lazily load a file based on its extension.
+
+        Pages (or rows) are read one at a time, so large files are never
+        fully materialized.
+
+        Args:
+            file_path: Path to file
+
+        Returns:
+            Iterator of Document objects
+
+        Raises:
+            ValueError: If file extension is not supported
+        """
+        path = os.fspath(file_path)
+        extension = Path(path).suffix.lower()
+
+        if extension not in self.SUPPORTED_EXTENSIONS:
+            raise ValueError(
+                f"Unsupported file extension: {extension}. "
+                f"Supported: {self.SUPPORTED_EXTENSIONS}"
+            )
+
+        logger.info("Streaming file: %s", path)
+
+        if extension == ".pdf" and self.pdf_backend == "pdfium":
+            return _iter_pdfium_pages(path, path)
+
+        loaders = {
+            ".pdf": PyPDFLoader,
+            ".txt": partial(TextLoader, encoding="utf-8"),
+            ".csv": partial(CSVLoader, encoding="utf-8"),
+        }
+
+        return loaders[extension](path).lazy_load()
 
     def load_from_upload(
         self,
@@ -151,6 +309,28 @@ class DocumentProcessor:
         Returns:
             List of Document objects
         """
+        documents = list(self.load_from_upload_iter(file, filename))
+
+        logger.info("Loaded %d documents from upload: %s", len(documents), filename)
+        return documents
+
+    def load_from_upload_iter(
+        self,
+        file: BinaryIO,
+        filename: str,
+    ) -> Iterator[Document]:
+        """Lazily load document pages (or rows) from an uploaded file.
+
+        Args:
+            file: File-like object
+            filename: Original filename
+
+        Returns:
+            Iterator of Document objects
+
+        Raises:
+            ValueError: If file extension is not supported
+        """
         extension = Path(filename).suffix.lower()
 
         if extension not in self.SUPPORTED_EXTENSIONS:
@@ -159,25 +339,76 @@ class DocumentProcessor:
                 f"Supported: {self.SUPPORTED_EXTENSIONS}"
             )
 
-        # Save to temporary file for processing
-        with tempfile.NamedTemporaryFile(
-            delete=False,
-            suffix=extension,
-        ) as tmp_file:
-            tmp_file.write(file.read())
-            tmp_path = tmp_file.name
+        # Parse straight from memory rather than round-tripping through disk
+        data = file.read()
+        parsers = {
+            ".pdf": self._parse_pdf_bytes,
+            ".txt": self._parse_text_bytes,
+            ".csv": self._parse_csv_bytes,
+        }
+        return parsers[extension](data, filename)
+
+    def _parse_pdf_bytes(self, data: bytes, source: str) -> Iterator[Document]:
+        """Parse PDF bytes into one Document per page, like PyPDFLoader.
+
+        Args:
+            data: Raw PDF bytes
+            source: Value for the ``source`` metadata field
+
+        Returns:
+            Iterator of Document objects with ``source`` and ``page`` metadata
+        """
+        if self.pdf_backend == "pdfium":
+            return _iter_pdfium_pages(data, source)
+
+        reader = PdfReader(io.BytesIO(data))
+        return (
+            Document(
+                page_content=page.extract_text(),
+                metadata={"source": source, "page": i},
+            )
+            for i, page in enumerate(reader.pages)
+        )
+
+    @staticmethod
+    def _parse_text_bytes(data: bytes, source: str) -> Iterator[Document]:
+        """Parse UTF-8 text bytes into a single Document, like TextLoader.
 
-        try:
-            documents = self.load_file(tmp_path)
+        Args:
+            data: Raw text bytes
+            source: Value for the ``source`` metadata field
+
+        Returns:
+            Iterator over the single Document
+        """
+        return iter([Document(page_content=data.decode("utf-8"), metadata={"source": source})])
 
-            # Update metadata with original filename
-            for doc in documents:
-                doc.metadata["source"] = filename
+    @staticmethod
+    def _parse_csv_bytes(data: bytes, source: str) -> Iterator[Document]:
+        """Parse CSV bytes into one Document per row, like CSVLoader.
 
-            return documents
-        finally:
-            # Clean up temp file
-            Path(tmp_path).unlink(missing_ok=True)
+        Rows with more fields than the header keep the extra values under a
+        ``None`` key, comma-joined, exactly as CSVLoader formats them.
+
+        Args:
+            data: Raw CSV bytes
+            source: Value for the ``source`` metadata field
+
+        Returns:
+            Iterator of Document objects with ``source`` and ``row`` metadata
+        """
+        reader = csv.DictReader(io.StringIO(data.decode("utf-8")))
+        return (
+            Document(
+                page_content="\n".join(
+                    f"{key.strip() if key is not None else key}: "
+                    f"{_format_csv_value(value)}"
+                    for key, value in row.items()
+                ),
+                metadata={"source": source, "row": i},
+            )
+            for i, row in enumerate(reader)
+        )
 
 
     def split_documents(self, documents: list[Document]) -> list[Document]:
@@ -189,25 +420,34 @@ class DocumentProcessor:
         Returns:
             List of chunked Document objects
         """
-        logger.info(f"Splitting {len(documents)} documents into chunks")
+        logger.info("Splitting %d documents into chunks", len(documents))
 
         chunks = self.text_splitter.split_documents(documents)
 
-        logger.info(f"Created {len(chunks)} chunks")
+        logger.info("Created %d chunks", len(chunks))
         return chunks
 
 
-    def process_file(self, file_path: str | Path) -> list[Document]:
+    def process_file(self, file_path: str | Path) -> Iterator[Document]:
         """Load and split a file in one step.
 
+        Each page is split as soon as it is read, so memory scales with the
+        page size rather than the document size.
+
         Args:
             file_path: Path to file
 
         Returns:
-            List of chunked Document objects
+            Iterator of chunked Document objects
+
+        Raises:
+            ValueError: If file extension is not supported
         """
-        documents = self.load_file(file_path)
-        return self.split_documents(documents)
+        return (
+            chunk
+            for page in self.load_file_iter(file_path)
+            for chunk in self.text_splitter.split_documents([page])
+        )
 
 
     def process_upload(
@@ -225,4 +465,47 @@ class DocumentProcessor:
             List of chunked Document objects
         """
         documents = self.load_from_upload(file, filename)
-        return self.split_documents(documents)
\ No newline at end of file
+        return self.split_documents(documents)
+
+    def process_upload_iter(
+        self,
+        file: BinaryIO,
+        filename: str,
+    ) -> Iterator[Document]:
+        """Load and split an uploaded file page by page.
+
+        Each page is split as soon as it is parsed, so only the raw upload
+        and the chunks not yet consumed are held in memory.
+
+        Args:
+            file: File-like object
+            filename: Original filename
+
+        Returns:
+            Iterator of chunked Document objects
+
+        Raises:
+            ValueError: If file extension is not supported
+        """
+        return (
+            chunk
+            for page in self.load_from_upload_iter(file, filename)
+            for chunk in self.text_splitter.split_documents([page])
+        )
+
+
+@lru_cache(maxsize=4)
+def get_document_processor(
+    chunk_size: int | None = None,
+    chunk_overlap: int | None = None,
+) -> DocumentProcessor:
+    """Get cached document processor instance.
+
+    Args:
+        chunk_size: Size of text chunks (default from settings)
+        chunk_overlap: Overlap between chunks (default from settings)
+
+    Returns:
+        Shared DocumentProcessor for the given parameters
+    """
+    return DocumentProcessor(chunk_size, chunk_overlap)
@@ -1,28 +1,92 @@
 """Embedding generation module using OpenAI embeddings."""
 
+import asyncio
+import logging
+import random
+import threading
+from collections import OrderedDict
 from functools import lru_cache
 
+import numpy as np
+from blake3 import blake3
 from langchain_openai import OpenAIEmbeddings
+from openai import APIConnectionError, InternalServerError, RateLimitError
 
 from app.config import get_settings
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Upper bound (seconds) for the random delay between launching batch tasks
+LAUNCH_JITTER_SECONDS = 0.05
+
+# Upper bound (seconds) for exponential backoff between rate-limited retries
+MAX_BACKOFF_SECONDS = 60.0
+
+# Process-wide LRU of embeddings keyed by the blake3 digest of the text, so
+# identical chunks (boilerplate, overlaps, re-uploads) are embedded once
+_embedding_cache: OrderedDict[bytes, np.ndarray] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale each row to unit length in place.
+
+    Args:
+        vectors: float32 array of shape (N, D)
+
+    Returns:
+        The same array, with rows normalized
+    """
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.clip(norms, 1e-12, None)
+    return vectors
+
+
+# Errors the batched embedding path retries itself; its client has retries off
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+
+
+def _retry_after_seconds(error: Exception) -> float | None:
+    """Read the Retry-After header from an OpenAI error, if present.
+
+    Args:
+        error: Error raised by the OpenAI client
+
+    Returns:
+        Delay in seconds, or None if the header is missing or not numeric
+    """
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+
+    retry_after = response.headers.get("retry-after")
+    try:
+        return float(retry_after) if retry_after is not None else None
+    except ValueError:
+        return None
+
 
 @lru_cache
-def get_embeddings() -> OpenAIEmbeddings:
+def get_embeddings(max_retries: int = 2) -> OpenAIEmbeddings:
     """Get cached OpenAI embeddings instance.
 
+    Args:
+        max_retries: Retries done by the OpenAI client itself; callers with
+            their own retry loop pass 0
+
     Returns:
         Configured OpenAIEmbeddings instance
     """
     settings = get_settings()
-    logger.info(f"Initializing embeddings model: {settings.embedding_model}")
+    logger.info("Initializing embeddings model: %s", settings.embedding_model)
 
     embeddings = OpenAIEmbeddings(
         model=settings.embedding_model,
+        dimensions=settings.embedding_dimensions,
         openai_api_key=settings.openai_api_key,
+        chunk_size=settings.openai_embedding_batch_size,
+        max_retries=max_retries,
     )
 
     logger.info("Embeddings model initialized successfully")
@@ -36,7 +100,14 @@ class EmbeddingService:
         """Initialize embedding service."""
         settings = get_settings()
         self.embeddings = get_embeddings()
+        # The batched async path retries on its own, so its client must not
+        self.retryless_embeddings = get_embeddings(max_retries=0)
         self.model_name = settings.embedding_model
+        self.dimensions = settings.embedding_dimensions
+        self.batch_size = settings.openai_embedding_batch_size
+        self.max_concurrency = settings.embedding_max_concurrency
+        self.max_retries = settings.embedding_max_retries
+        self.cache_max_entries = settings.embedding_cache_max_entries
 
     def embed_query(self, text: str) -> list[float]:
         """Generate embedding for a single query.
@@ -47,17 +118,210 @@ class EmbeddingService:
         Returns:
             Embedding vector as list of floats
         """
-        logger.debug(f"Generating embedding for query: {text[:50]}...")
-        return self.embeddings.embed_query(text)
+        logger.debug("Generating embedding for query: %.50s...", text)
+        embedding_query = self.embeddings.embed_query(text)
 
-    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Generated embedding of length %d", len(embedding_query))
+        return embedding_query
+
+    def embed_documents(self, texts: list[str]) -> np.ndarray:
         """Generate embeddings for multiple documents.
 
+        Empty or whitespace-only texts are skipped, since the OpenAI API
+        rejects them. Texts already in the embedding cache are served from
+        it; the rest are sent in batches of ``batch_size``. Vectors are
+        L2-normalized, so dot product equals cosine similarity.
+
+        Args:
+            texts: List of document texts
+
+        Returns:
+            float32 array of shape (N, dimensions), one row per non-empty text
+        """
+        texts = [text for text in texts if text.strip()]
+        keys, found, misses = self._lookup_cached(texts)
+
+        miss_keys = list(misses)
+        miss_texts = list(misses.values())
+        for start in range(0, len(miss_texts), self.batch_size):
+            batch = miss_texts[start : start + self.batch_size]
+            vectors = _l2_normalize(
+                np.asarray(self.embeddings.embed_documents(batch), dtype=np.float32)
+            )
+            found.update(zip(miss_keys[start : start + self.batch_size], vectors))
+
+        self._store_cached(miss_keys, found)
+        embeddings_document = self._assemble(keys, found)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Generated embeddings for %d documents (%d cache hits)",
+                len(embeddings_document),
+                len(texts) - len(miss_texts),
+            )
+        return embeddings_document
+
+    async def aembed_documents_batched(
+        self,
+        texts: list[str],
+        batch_size: int | None = None,
+        max_concurrency: int | None = None,
+    ) -> np.ndarray:
+        """Generate embeddings with several batches in flight at once.
+
+        Texts already in the embedding cache are served from it. The rest
+        are dispatched in concurrent batches, bounded by a semaphore, and the
+        results are reassembled in input order. Empty or whitespace-only
+        texts are skipped and vectors are L2-normalized, as in
+        ``embed_documents``.
+
         Args:
             texts: List of document texts
+            batch_size: Texts per request (default from settings)
+            max_concurrency: Maximum batches in flight (default from settings)
+
+        Returns:
+            float32 array of shape (N, dimensions), one row per non-empty text
+        """
+        texts = [text for text in texts if text.strip()]
+        batch_size = batch_size or self.batch_size
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        keys, found, misses = self._lookup_cached(texts)
+
+        miss_keys = list(misses)
+        miss_texts = list(misses.values())
+        vectors = np.empty((len(miss_texts), self.dimensions), dtype=np.float32)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Generating embeddings for %d documents (%d cache hits) "
+                "in batches of %d",
+                len(texts),
+                len(texts) - len(miss_texts),
+                batch_size,
+            )
+
+        async def embed_batch(start: int) -> None:
+            batch = miss_texts[start : start + batch_size]
+            async with semaphore:
+                batch_vectors = await self._aembed_with_retry(batch)
+            vectors[start : start + len(batch_vectors)] = batch_vectors
+
+        # A failing batch cancels the others, so nothing keeps calling the API
+        # after the request has failed
+        try:
+            async with asyncio.TaskGroup() as group:
+                for start in range(0, len(miss_texts), batch_size):
+                    group.create_task(embed_batch(start))
+                    # Stagger launches so batches don't hit the API in lockstep
+                    await asyncio.sleep(random.uniform(0, LAUNCH_JITTER_SECONDS))
+        except ExceptionGroup as e:
+            raise e.exceptions[0] from None
+
+        found.update(zip(miss_keys, _l2_normalize(vectors)))
+        self._store_cached(miss_keys, found)
+        return self._assemble(keys, found)
+
+    async def _aembed_with_retry(self, texts: list[str]) -> list[list[float]]:
+        """Embed one batch, backing off and retrying on transient errors.
+
+        Uses a client with its own retries disabled, so each attempt here is
+        a single request.
+
+        Args:
+            texts: Batch of document texts
 
         Returns:
             List of embedding vectors
+
+        Raises:
+            RateLimitError: If the batch is still rate limited after all retries
+            APIConnectionError: If the API is still unreachable after all retries
+            InternalServerError: If the API still fails after all retries
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self.retryless_embeddings.aembed_documents(texts)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+
+                delay = _retry_after_seconds(e)
+                if delay is None:
+                    delay = min(2**attempt, MAX_BACKOFF_SECONDS)
+                delay += random.uniform(0, 1)
+
+                logger.warning(
+                    "Embedding batch failed (%s), retrying in %.1fs (attempt %d/%d)",
+                    type(e).__name__,
+                    delay,
+                    attempt + 1,
+                    self.max_retries,
+                )
+                await asyncio.sleep(delay)
+
+    def _lookup_cached(
+        self,
+        texts: list[str],
+    ) -> tuple[list[bytes], dict[bytes, np.ndarray], dict[bytes, str]]:
+        """Split texts into embedding cache hits and misses.
+
+        Args:
+            texts: Non-empty document texts
+
+        Returns:
+            (cache key per text, vectors found by key, texts to embed by key);
+            misses are de-duplicated
+        """
+        keys = [blake3(text.encode()).digest() for text in texts]
+
+        found: dict[bytes, np.ndarray] = {}
+        misses: dict[bytes, str] = {}
+        with _cache_lock:
+            for key, text in zip(keys, texts):
+                if key in _embedding_cache:
+                    _embedding_cache.move_to_end(key)
+                    found[key] = _embedding_cache[key]
+                elif key not in misses:
+                    misses[key] = text
+
+        return keys, found, misses
+
+    def _store_cached(
+        self,
+        keys: list[bytes],
+        found: dict[bytes, np.ndarray],
+    ) -> None:
+        """Insert newly embedded vectors into the cache, evicting the oldest.
+
+        Args:
+            keys: Cache keys of the newly embedded texts
+            found: Vectors by cache key
+        """
+        with _cache_lock:
+            for key in keys:
+                # Copy: rows are views into their batch array, and a cached
+                # view would keep the whole batch buffer alive
+                _embedding_cache[key] = found[key].copy()
+            while len(_embedding_cache) > self.cache_max_entries:
+                _embedding_cache.popitem(last=False)
+
+    def _assemble(
+        self,
+        keys: list[bytes],
+        found: dict[bytes, np.ndarray],
+    ) -> np.ndarray:
+        """Stack vectors into a contiguous array in input order.
+
+        Args:
+            keys: Cache key per input text
+            found: Vectors by cache key
+
+        Returns:
+            float32 array of shape (len(keys), dimensions)
         """
-        logger.debug(f"Generating embeddings for {len(texts)} documents")
-        return self.embeddings.embed_documents(texts)
\ No newline at end of file
+        embeddings = np.empty((len(keys), self.dimensions), dtype=np.float32)
+        for i, key in enumerate(keys):
+            embeddings[i] = found[key]
+        return embeddings
@@ -1,24 +1,72 @@
 """Vector store module for Qdrant operations."""
 
+import asyncio
+import threading
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import lru_cache
+from itertools import islice
 from typing import Any
-from uuid import uuid4
 
+import grpc
+import numpy as np
+import xxhash
 from langchain_core.documents import Document
 from langchain_qdrant import QdrantVectorStore
 from qdrant_client import QdrantClient
 from qdrant_client.http.exceptions import UnexpectedResponse
-from qdrant_client.http.models import Distance, VectorParams
+from qdrant_client.http.models import (
+    Batch,
+    Distance,
+    HnswConfigDiff,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParams,
+)
 
 from app.config import get_settings
-from app.core.embeddings import get_embeddings
+from app.core.embeddings import EmbeddingService, get_embeddings
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 settings = get_settings()
 
-# Embedding dimension for text-embedding-3-small
-EMBEDDING_DIMENSION = 1536
+# int8 scalar quantization keeps a 4x smaller copy of the vectors in RAM;
+# searches oversample on it and rescore against the original vectors
+QUANTIZATION_CONFIG = ScalarQuantization(
+    scalar=ScalarQuantizationConfig(
+        type=ScalarType.INT8,
+        quantile=0.99,
+        always_ram=True,
+    ),
+)
+HNSW_CONFIG = HnswConfigDiff(m=16, ef_construct=128)
+SEARCH_PARAMS = SearchParams(
+    quantization=QuantizationSearchParams(rescore=True, oversampling=2.0),
+)
+
+# Distance of each (client id, collection name) known to exist, so repeated
+# service construction skips the get_collection round-trip
+_existing_collections: dict[tuple[int, str], Distance] = {}
+_ensure_lock = threading.Lock()
+
+
+def _batched(iterable: Iterable[Document], size: int) -> Iterator[list[Document]]:
+    """Yield successive lists of up to ``size`` items from an iterable.
+
+    Args:
+        iterable: Items to group
+        size: Maximum items per list
+
+    Yields:
+        Lists of items, the last one possibly shorter
+    """
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
 
 
 @lru_cache
@@ -28,11 +76,15 @@ def get_qdrant_client() -> QdrantClient:
     Returns:
         Configured QdrantClient instance
     """
-    logger.info(f"Connecting to Qdrant at: {settings.qdrant_url}")
+    logger.info("Connecting to Qdrant at: %s", settings.qdrant_url)
 
     client = QdrantClient(
         url=settings.qdrant_url,
         api_key=settings.qdrant_api_key,
+        prefer_grpc=settings.qdrant_prefer_grpc,
+        grpc_port=settings.qdrant_grpc_port,
+        grpc_compression=grpc.Compression.Gzip,
+        timeout=settings.qdrant_timeout,
     )
 
     logger.info("Qdrant client connected successfully")
@@ -52,62 +104,275 @@ class VectorStoreService:
         self.collection_name = collection_name or settings.collection_name
         self.client = get_qdrant_client()
         self.embeddings = get_embeddings()
+        self.embedding_service = EmbeddingService()
 
         # Ensure collection exists
-        self._ensure_collection()
+        self.distance = self._ensure_collection()
 
-        # Initialize LangChain Qdrant vector store
+        # Initialize LangChain Qdrant vector store; its distance must match the
+        # collection's, which is DOT for new collections and COSINE for older ones
         self.vector_store = QdrantVectorStore(
             client=self.client,
             collection_name=self.collection_name,
             embedding=self.embeddings,
+            distance=self.distance,
         )
 
-        logger.info(f"VectorStoreService initialized for collection: {self.collection_name}")
+        logger.info("VectorStoreService initialized for collection: %s", self.collection_name)
 
-    def _ensure_collection(self) -> None:
-        """Ensure the collection exists, create if not."""
-        try:
-            collection_info = self.client.get_collection(self.collection_name)
-            logger.info(
-                f"Collection '{self.collection_name}' exists with "
-                f"{collection_info.points_count} points"
-            )
-        except UnexpectedResponse:
-            logger.info(f"Creating collection: {self.collection_name}")
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=VectorParams(
-                    size=EMBEDDING_DIMENSION,
-                    distance=Distance.COSINE,
-                ),
-            )
-            logger.info(f"Collection '{self.collection_name}' created successfully")
+    def _ensure_collection(self) -> Distance:
+        """Ensure the collection exists, create if not.
 
-    def add_documents(self, documents: list[Document]) -> list[str]:
+        Returns:
+            Distance metric the collection is configured with
+        """
+        key = (id(self.client), self.collection_name)
+        distance = _existing_collections.get(key)
+        if distance is not None:
+            return distance
+
+        with _ensure_lock:
+            distance = _existing_collections.get(key)
+            if distance is not None:
+                return distance
+
+            # collection_exists works over both REST and gRPC, which raise
+            # different errors from get_collection for a missing collection
+            if self.client.collection_exists(self.collection_name):
+                collection_info = self.client.get_collection(self.collection_name)
+                distance = collection_info.config.params.vectors.distance
+                logger.info(
+                    "Collection '%s' exists with %s points",
+                    self.collection_name,
+                    collection_info.points_count,
+                )
+            else:
+                logger.info("Creating collection: %s", self.collection_name)
+                # Stored vectors are unit-normalized, so dot product ranks
+                # like cosine without Qdrant's norm step
+                distance = Distance.DOT
+                self.client.create_collection(
+                    collection_name=self.collection_name,
+                    vectors_config=VectorParams(
+                        size=settings.embedding_dimensions,
+                        distance=distance,
+                    ),
+                    quantization_config=QUANTIZATION_CONFIG,
+                    hnsw_config=HNSW_CONFIG,
+                )
+                logger.info("Collection '%s' created successfully", self.collection_name)
+
+            _existing_collections[key] = distance
+            return distance
+
+    def add_documents(
+        self,
+        documents: Iterable[Document],
+        batch_size: int | None = None,
+    ) -> list[int]:
         """Add documents to the vector store.
 
+        Documents are embedded and upserted in batches. The upsert of one
+        batch runs in a background thread while the next batch is embedded,
+        and one further batch is read ahead to tell when the last batch is
+        reached, so at most three batches are held in memory at a time. Any
+        iterable is accepted, so streamed chunks are consumed one batch at a
+        time.
+
+        Point IDs are 64-bit hashes of each document's source, page,
+        position and content, so re-ingesting the same file overwrites its
+        points rather than duplicating them, while different files that
+        share a name do not collide.
+
         Args:
-            documents: List of Document objects to add
+            documents: Document objects to add
+            batch_size: Documents per batch (default from settings)
 
         Returns:
             List of document IDs
         """
-        if not documents:
+        batch_size = batch_size or settings.upsert_batch_size
+
+        # Empty texts are rejected by the embeddings API
+        batches = _batched(
+            (doc for doc in documents if doc.page_content.strip()),
+            batch_size,
+        )
+
+        ids: list[int] = []
+        pending: Future | None = None
+        batch = next(batches, None)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            while batch is not None:
+                batch_ids = self._point_ids(batch, offset=len(ids))
+                vectors = self.embedding_service.embed_documents(
+                    [doc.page_content for doc in batch]
+                )
+                next_batch = next(batches, None)
+
+                # Bound memory: wait for the previous upsert before queuing another
+                if pending is not None:
+                    pending.result()
+
+                pending = executor.submit(
+                    self._upsert,
+                    batch,
+                    batch_ids,
+                    vectors,
+                    batch_size,
+                    next_batch is None,
+                )
+                ids.extend(batch_ids)
+                batch = next_batch
+
+            if pending is not None:
+                pending.result()
+
+        if not ids:
             logger.warning("No documents to add")
             return []
 
-        logger.info(f"Adding {len(documents)} documents to collection")
+        logger.info("Successfully added %d documents", len(ids))
+        return ids
 
-        # Generate unique IDs for each document
-        ids = [str(uuid4()) for _ in documents]
+    async def aadd_documents(
+        self,
+        documents: Iterable[Document],
+        batch_size: int | None = None,
+    ) -> list[int]:
+        """Add documents to the vector store without blocking the event loop.
+
+        Like ``add_documents``, but documents are embedded in windows of
+        several API batches that are sent concurrently. Reading the iterable
+        (which may parse and split pages) and upserting run in worker
+        threads, and the upsert of one window overlaps the embedding of the
+        next.
 
-        # Add to vector store
-        self.vector_store.add_documents(documents, ids=ids)
+        Args:
+            documents: Document objects to add
+            batch_size: Documents per upsert (default from settings)
 
-        logger.info(f"Successfully added {len(documents)} documents")
+        Returns:
+            List of document IDs
+        """
+        batch_size = batch_size or settings.upsert_batch_size
+        window_size = (
+            self.embedding_service.batch_size * self.embedding_service.max_concurrency
+        )
+
+        # Empty texts are rejected by the embeddings API
+        windows = _batched(
+            (doc for doc in documents if doc.page_content.strip()),
+            window_size,
+        )
+
+        ids: list[int] = []
+        pending: asyncio.Task | None = None
+
+        try:
+            window = await asyncio.to_thread(next, windows, None)
+
+            while window is not None:
+                window_ids = self._point_ids(window, offset=len(ids))
+                vectors = await self.embedding_service.aembed_documents_batched(
+                    [doc.page_content for doc in window]
+                )
+                next_window = await asyncio.to_thread(next, windows, None)
+
+                # Bound memory: wait for the previous upsert before queuing another
+                if pending is not None:
+                    await pending
+
+                pending = asyncio.create_task(
+                    asyncio.to_thread(
+                        self._upsert,
+                        window,
+                        window_ids,
+                        vectors,
+                        batch_size,
+                        next_window is None,
+                    )
+                )
+                ids.extend(window_ids)
+                window = next_window
+
+            if pending is not None:
+                await pending
+        finally:
+            # On failure, let an in-flight upsert finish (its thread cannot be
+            # interrupted) and retrieve its result so it is not left unawaited
+            if pending is not None:
+                await asyncio.gather(pending, return_exceptions=True)
+
+        if not ids:
+            logger.warning("No documents to add")
+            return []
+
+        logger.info("Successfully added %d documents", len(ids))
         return ids
 
+    @staticmethod
+    def _point_ids(documents: list[Document], offset: int) -> list[int]:
+        """Derive deterministic point IDs for a batch of documents.
+
+        The content is part of the key, so two different uploads with the
+        same filename get distinct IDs.
+
+        Args:
+            documents: Documents in the batch
+            offset: Position of the first document within the ingest
+
+        Returns:
+            List of 64-bit point IDs
+        """
+        return [
+            xxhash.xxh64_intdigest(
+                f"{doc.metadata.get('source', '')}:"
+                f"{doc.metadata.get('page', 0)}:{offset + i}:"
+                f"{doc.page_content}".encode()
+            )
+            for i, doc in enumerate(documents)
+        ]
+
+    def _upsert(
+        self,
+        documents: list[Document],
+        ids: list[int],
+        vectors: np.ndarray,
+        batch_size: int,
+        wait: bool,
+    ) -> None:
+        """Upsert embedded documents in batches of ``batch_size`` points.
+
+        Args:
+            documents: Documents to store as payloads
+            ids: Point ID per document
+            vectors: Embedding per document
+            batch_size: Points per upsert request
+            wait: Whether the final request waits until it is applied; Qdrant
+                applies updates in order, so this covers the earlier ones too
+        """
+        for start in range(0, len(documents), batch_size):
+            end = start + batch_size
+            # One columnar Batch per upsert rather than a PointStruct per point
+            points = Batch(
+                ids=ids[start:end],
+                vectors=vectors[start:end].tolist(),
+                payloads=[
+                    {
+                        self.vector_store.content_payload_key: doc.page_content,
+                        self.vector_store.metadata_payload_key: doc.metadata,
+                    }
+                    for doc in documents[start:end]
+                ],
+            )
+            self.client.upsert(
+                collection_name=self.collection_name,
+                points=points,
+                wait=wait and end >= len(documents),
+            )
+
     def search(
         self,
         query: str,
@@ -123,11 +388,15 @@ class VectorStoreService:
             List of similar Document objects
         """
         k = k or settings.retrieval_k
-        logger.debug(f"Searching for: {query[:50]}... (k={k})")
+        logger.debug("Searching for: %.50s... (k=%d)", query, k)
 
-        results = self.vector_store.similarity_search(query, k=k)
+        results = self.vector_store.similarity_search(
+            query,
+            k=k,
+            search_params=SEARCH_PARAMS,
+        )
 
-        logger.debug(f"Found {len(results)} results")
+        logger.debug("Found %d results", len(results))
         return results
 
     def search_with_scores(
@@ -145,11 +414,15 @@ class VectorStoreService:
             List of (Document, score) tuples
         """
         k = k or settings.retrieval_k
-        logger.debug(f"Searching with scores for: {query[:50]}... (k={k})")
+        logger.debug("Searching with scores for: %.50s... (k=%d)", query, k)
 
-        results = self.vector_store.similarity_search_with_score(query, k=k)
+        results = self.vector_store.similarity_search_with_score(
+            query,
+            k=k,
+            search_params=SEARCH_PARAMS,
+        )
 
-        logger.debug(f"Found {len(results)} results with scores")
+        logger.debug("Found %d results with scores", len(results))
         return results
 
     def get_retriever(self, k: int | None = None) -> Any:
@@ -165,14 +438,15 @@ class VectorStoreService:
 
         return self.vector_store.as_retriever(
             search_type="similarity",
-            search_kwargs={"k": k},
+            search_kwargs={"k": k, "search_params": SEARCH_PARAMS},
         )
 
     def delete_collection(self) -> None:
         """Delete the entire collection."""
-        logger.warning(f"Deleting collection: {self.collection_name}")
+        logger.warning("Deleting collection: %s", self.collection_name)
         self.client.delete_collection(self.collection_name)
-        logger.info(f"Collection '{self.collection_name}' deleted")
+        _existing_collections.pop((id(self.client), self.collection_name), None)
+        logger.info("Collection '%s' deleted", self.collection_name)
 
     def get_collection_info(self) -> dict:
         """Get information about the collection.
@@ -188,7 +462,7 @@ class VectorStoreService:
                 "indexed_vectors_count": info.indexed_vectors_count,
                 "status": info.status.value,
             }
-        except UnexpectedResponse:
+        except (UnexpectedResponse, grpc.RpcError):
             return {
                 "name": self.collection_name,
                 "points_count": 0,
@@ -206,5 +480,18 @@ class VectorStoreService:
             self.client.get_collections()
             return True
         except Exception as e:
-            logger.error(f"Vector store health check failed: {e}")
-            return False
\ No newline at end of file
+            logger.error("Vector store health check failed: %s", e)
+            return False
+
+
+@lru_cache(maxsize=4)
+def get_vector_store_service(collection_name: str | None = None) -> VectorStoreService:
+    """Get cached vector store service instance.
+
+    Args:
+        collection_name: Name of the Qdrant collection (default from settings)
+
+    Returns:
+        Shared VectorStoreService for the collection
+    """
+    return VectorStoreService(collection_name)